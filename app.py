@@ -1,9 +1,16 @@
-import json
+import contextlib
+import hashlib
 import math
+import os
+import tempfile
+from pathlib import Path
 
+import numpy as np
+import orjson
 import pandas as pd
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
 from streamlit_extras.stylable_container import stylable_container
 
 from src.config import PROCESSED_DIR, STATIONS_PATH
@@ -20,9 +27,14 @@ st.set_page_config(
 
 API_BASE = "https://creativecommons.tankerkoenig.de/json"
 API_KEY = st.secrets["tankerkoenig"]["api_key"]
+PRICES_URL = f"{API_BASE}/prices.php"
 
 # Globale Spritpreis-Tabelle, wird im Hauptteil befüllt
 spritpreise: dict[str, float] = {}
+spritpreise_series = pd.Series(dtype="float64")
+
+# Wählbare Benzinsorten für Benzin- und Hybridmotoren
+SPRIT_ARTEN = ("Super E10", "Super E5", "Super+")
 
 # Farbpalette gemäß Vorgabe
 PRIMARY_DEEP = "#002733"
@@ -38,6 +50,17 @@ TRAFFIC_RED = "#DA0C1F"
 TRAFFIC_AMBER = "#FCCD22"
 TRAFFIC_GREEN = "#63A844"
 
+# Geldspalten im Ranking (Anzeige als aufgerundete Euro-Beträge)
+GELD_SPALTEN = (
+    "UVP",
+    "Leasingkosten / Monat",
+    "Leasingkosten (Gesamt)",
+    "Spritkosten / Monat",
+    "Spritkosten (Gesamt)",
+    "Gesamtkosten / Monat",
+    "Kosten (Gesamt)",
+)
+
 # Aus Theme lesen (Light/Dark aus config.toml/Streamlit Settings)
 theme_base = st.get_option("theme.base") or "dark"
 dark_mode = theme_base == "dark"
@@ -58,8 +81,28 @@ divider_html = f"<hr style='border: 1px solid {card_border}; opacity: 0.3;'/>"
 # Hilfsfunktionen & Daten-Logik
 # =====================================================================
 
+@st.cache_resource
+def ranking_column_config() -> dict:
+    """
+    Spaltenformate für das ausführliche Ranking.
+
+    Wird einmalig pro Prozess aufgebaut, da Streamlit das Skript bei jedem
+    Rerun neu ausführt. st.dataframe kopiert die Einträge vor Änderungen.
+    """
+    return {
+        "Bild": st.column_config.ImageColumn(),
+        **{col: st.column_config.NumberColumn(format="€%.0f") for col in GELD_SPALTEN},
+        "Geldwerter Vorteil / Monat": st.column_config.NumberColumn(format="€%.2f"),
+        "Steuerlicher Aufschlag / Monat": st.column_config.NumberColumn(format="€%.2f"),
+        "Freikilometer": st.column_config.NumberColumn(format="%.0f"),
+        "Verbrauch_L_100": st.column_config.NumberColumn(format="%.1f"),
+        "Verbrauch_kWh_100": st.column_config.NumberColumn(format="%.1f"),
+        "Leasingrate_Faktor": st.column_config.NumberColumn(format="%.1f"),
+    }
+
+
 def find_leasing_bedingung(
-    leasing_df: pd.DataFrame,
+    leasing_groups: dict,
     kategorie: str,
     modell: str,
 ) -> tuple[str, str]:
@@ -71,56 +114,149 @@ def find_leasing_bedingung(
       2) Fallback "Rest" für die Kategorie
       3) Rückfall auf ursprüngliche Kombination
     """
-    mask_exact = (
-        (leasing_df["Bedingung Kraftstoff"] == kategorie)
-        & (leasing_df["Bedingung Modell"] == modell)
-    )
-    if mask_exact.any():
+    if (kategorie, modell) in leasing_groups:
         return kategorie, modell
 
-    mask_rest = (
-        (leasing_df["Bedingung Kraftstoff"] == kategorie)
-        & (leasing_df["Bedingung Modell"] == "Rest")
-    )
-    if mask_rest.any():
+    if (kategorie, "Rest") in leasing_groups:
         return kategorie, "Rest"
 
     return kategorie, modell
 
 
-@st.cache_data
-def load_data() -> tuple[pd.DataFrame, pd.DataFrame]:
+def read_csv_cached(csv_path: Path, dtype: dict[str, str]) -> pd.DataFrame:
     """
-    Lädt Autos- und Leasing-Daten aus dem processed-Verzeichnis
-    und bereinigt numerische Spalten.
+    Liest eine CSV über den pyarrow-Parser und legt daneben eine Parquet-Kopie ab.
+
+    Der Dateiname der Kopie enthält einen Hash des dtype-Schemas, eine
+    geänderte Typvorgabe verwirft alte Kopien also automatisch. Ist die
+    passende Kopie neuer als die CSV, wird direkt sie gelesen (inkl. der
+    Kategorien und Ganzzahl-Typen). Ist sie beschädigt oder schlägt das
+    Schreiben fehl, bleibt es beim CSV-Import.
+    """
+    schema = hashlib.sha1(orjson.dumps(dtype, option=orjson.OPT_SORT_KEYS))
+    parquet_path = csv_path.with_name(
+        f"{csv_path.stem}.{schema.hexdigest()[:8]}.parquet"
+    )
+    if (
+        parquet_path.exists()
+        and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime
+    ):
+        try:
+            return pd.read_parquet(parquet_path, engine="pyarrow")
+        except Exception:
+            # Abgebrochene oder fremde Datei → verwerfen und neu aufbauen
+            with contextlib.suppress(OSError):
+                parquet_path.unlink(missing_ok=True)
+
+    df = pd.read_csv(csv_path, sep=";", engine="pyarrow", dtype=dtype)
+
+    # Erst in eine temporäre Datei schreiben, dann atomar umbenennen,
+    # damit nie eine halb geschriebene Kopie unter dem finalen Namen liegt
+    tmp_path = None
+    try:
+        fd, tmp_name = tempfile.mkstemp(
+            dir=csv_path.parent, prefix=f".{csv_path.stem}.", suffix=".tmp"
+        )
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        df.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+        os.chmod(tmp_path, 0o644)  # mkstemp legt die Datei nur für den Besitzer an
+        os.replace(tmp_path, parquet_path)
+        tmp_path = None
+
+        # Kopien mit veraltetem Schema aufräumen
+        for alt in csv_path.parent.glob(f"{csv_path.stem}.*.parquet"):
+            if alt != parquet_path:
+                alt.unlink(missing_ok=True)
+    except Exception:
+        if tmp_path is not None:
+            with contextlib.suppress(OSError):
+                tmp_path.unlink(missing_ok=True)
+    return df
+
+
+@st.cache_resource(show_spinner=False)
+def load_data() -> tuple[dict, dict]:
+    """
+    Lädt Autos- und Leasing-Daten aus dem processed-Verzeichnis,
+    bereinigt numerische Spalten und liefert die Lookup-Strukturen
+    für die Autoauswahl:
+      - tree: Modell → Ausstattungslinie → Motor → Datensatz (dict)
+      - leasing_groups: (Bedingung Kraftstoff, Bedingung Modell) → Leasingoption → Datensatz
+
+    Die Objekte werden ohne Kopie von allen Sessions geteilt und
+    dürfen deshalb nur gelesen werden.
     """
     autos_path = PROCESSED_DIR / "autos.csv"
     leasing_path = PROCESSED_DIR / "leasing.csv"
 
-    autos = pd.read_csv(autos_path, sep=";")
-    leasing = pd.read_csv(leasing_path, sep=";")
+    # pyarrow-Parser mit festem Schema: Texte direkt als Kategorien,
+    # Verbrauch als float32 (eine Nachkommastelle reicht)
+    autos = read_csv_cached(
+        autos_path,
+        {
+            "Modell": "category",
+            "Ausstattungslinie": "category",
+            "Motor": "category",
+            "Kategorie": "category",
+            "Kraftstoff": "category",
+            "l/100km": "float32",
+            "kWh/100km": "float32",
+            "Preis": "float64",
+        },
+    )
+    leasing = read_csv_cached(
+        leasing_path,
+        {
+            "Leasingoption": "category",
+            "Leasingrate": "float64",
+            "Laufzeit": "Int16",
+            "Freikilometer": "int32",
+            "Tankguthaben": "int32",
+            "Bedingung Kraftstoff": "category",
+            "Bedingung Modell": "category",
+        },
+    )
+
+    # Kraftstoff einmalig klein schreiben, Vergleiche laufen dann auf Codes
+    autos["Kraftstoff"] = autos["Kraftstoff"].str.lower().astype("category")
+
+    # Fehlende Verbrauchs- und Preiswerte als 0 behandeln
+    autos = autos.fillna({"l/100km": 0.0, "kWh/100km": 0.0, "Preis": 0.0})
 
-    # Verbrauchsspalten numerisch
-    for col in ("l/100km", "kWh/100km"):
-        if col in autos.columns:
-            autos[col] = pd.to_numeric(autos[col], errors="coerce").fillna(0.0)
+    # Leasingrate + Laufzeit ohne Lücken, Laufzeit danach als einfacher int16
+    leasing = leasing.fillna({"Leasingrate": 0.0, "Laufzeit": 0}).astype(
+        {"Laufzeit": "int16"}
+    )
+
+    # Bei doppelten Motoren gewinnt (wie bisher) der erste Datensatz
+    tree: dict[str, dict[str, dict[str, dict]]] = {}
+    for rec in autos.to_dict("records"):
+        tree.setdefault(rec["Modell"], {}).setdefault(
+            rec["Ausstattungslinie"], {}
+        ).setdefault(rec["Motor"], rec)
 
-    # Leasingrate + Laufzeit numerisch
-    for col, default in (("Leasingrate", 0.0), ("Laufzeit", 0)):
-        if col in leasing.columns:
-            leasing[col] = pd.to_numeric(leasing[col], errors="coerce").fillna(default)
+    # Leasingoptionen je Bedingung in Dateireihenfolge, erste Zeile je Option gewinnt
+    leasing_groups: dict[tuple[str, str], dict[str, dict]] = {}
+    for rec in leasing.to_dict("records"):
+        leasing_groups.setdefault(
+            (rec["Bedingung Kraftstoff"], rec["Bedingung Modell"]), {}
+        ).setdefault(rec["Leasingoption"], rec)
 
-    return autos, leasing
+    return tree, leasing_groups
 
 
-@st.cache_data
-def load_stations() -> list[dict]:
+@st.cache_resource
+def load_stations() -> tuple[list[dict], str]:
     """
     Lädt eine lokale Stationsliste aus STATIONS_PATH.
+
+    Liefert zusätzlich die kommagetrennten Stations-IDs für die
+    Tankerkönig-Abfrage, damit diese nicht bei jedem Abruf neu entstehen.
     """
-    with STATIONS_PATH.open("r", encoding="utf-8") as f:
-        stations = json.load(f)
-    return stations
+    stations = orjson.loads(STATIONS_PATH.read_bytes())
+    ids_csv = ",".join(str(s["id"]) for s in stations if s.get("id"))
+    return stations, ids_csv
 
 
 def clear_slot_state(slot_id: int) -> None:
@@ -213,7 +349,21 @@ def auto_selectbox_single(
     )
 
 
-@st.cache_data(ttl=300)
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """
+    Gemeinsame HTTP-Session für die Tankerkönig-API.
+
+    Wird über alle Sessions geteilt, damit TCP/TLS-Verbindungen
+    (Keep-Alive) wiederverwendet werden.
+    """
+    session = requests.Session()
+    session.headers.update({"Accept": "application/json"})
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
+
+
+@st.cache_data(ttl=300, max_entries=1)
 def get_fuel_prices() -> dict:
     """
     Holt Preise für mehrere Tankstellen-IDs über die Tankerkönig-API.
@@ -223,22 +373,21 @@ def get_fuel_prices() -> dict:
       - leeres Dict bei Fehlern (Netzwerk, API, etc.)
     """
     try:
-        stations = load_stations()
+        _, ids_csv = load_stations()
     except Exception:
         return {}
 
-    id_liste = [s.get("id") for s in stations if s.get("id")]
-    if not id_liste:
+    if not ids_csv:
         return {}
 
     try:
-        response = requests.get(
-            f"{API_BASE}/prices.php",
-            params={"ids": ",".join(id_liste), "apikey": API_KEY},
+        response = get_http_session().get(
+            PRICES_URL,
+            params={"ids": ids_csv, "apikey": API_KEY},
             timeout=10,
         )
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
     except Exception:
         return {}
 
@@ -254,7 +403,6 @@ def get_fuel_prices() -> dict:
     }
 
 
-@st.cache_data(ttl=300)
 def get_fuel_stats() -> dict:
     """
     Aggregiert min/avg/max für e5, e10 und diesel basierend auf Tankerkönig-Daten.
@@ -267,29 +415,25 @@ def get_fuel_stats() -> dict:
     if not prices:
         raise RuntimeError("Keine Preise von Tankerkönig erhalten.")
 
-    kraftstoffe = ("e5", "e10", "diesel")
-    stats = {"min": {}, "avg": {}, "max": {}}
-
-    for fuel in kraftstoffe:
-        values = [
-            round(float(info[fuel]), 3)
-            for info in prices.values()
-            if fuel in info and info[fuel] is not None
-        ]
-        if not values:
-            stats["min"][fuel] = stats["avg"][fuel] = stats["max"][fuel] = None
-            continue
+    kraftstoffe = ["e5", "e10", "diesel"]
 
-        stats["min"][fuel] = min(values)
-        stats["avg"][fuel] = round(sum(values) / len(values), 3)
-        stats["max"][fuel] = max(values)
+    # Preise als Tabelle Station × Kraftstoff, fehlende Werte als NaN
+    werte = (
+        pd.DataFrame.from_dict(prices, orient="index")
+        .reindex(columns=kraftstoffe)
+        .astype("float64")
+        .round(3)
+    )
+    agg = werte.agg(["min", "mean", "max"]).rename(index={"mean": "avg"})
+    agg.loc["avg"] = agg.loc["avg"].round(3)
 
-    return stats
+    # Kraftstoffe ohne Preis bleiben None
+    return agg.astype(object).where(agg.notna(), None).to_dict(orient="index")
 
 
-def berechne_kosten(row: pd.Series) -> pd.Series:
+def berechne_kosten(raw_df: pd.DataFrame) -> pd.DataFrame:
     """
-    Berechnet Leasing- und Betriebskosten auf Basis einer Zeile aus dem Ranking-DataFrame.
+    Berechnet Leasing- und Betriebskosten spaltenweise für den gesamten Ranking-DataFrame.
 
     Erwartete Spalten:
       - UVP
@@ -298,90 +442,66 @@ def berechne_kosten(row: pd.Series) -> pd.Series:
       - Leasingrate_Faktor
       - Verbrauch_L_100
       - Verbrauch_kWh_100
-      - Kraftstoff
-      - Sprit (Schlüssel in spritpreise)
+      - Kraftstoff (klein geschrieben)
+      - Sprit (Schlüssel in spritpreise_series)
 
-    nutzt die globale spritpreise-Tabelle.
+    nutzt die globale spritpreise_series. Die Werte bleiben ungerundet,
+    damit die Sortierung des Rankings auf exakten Kosten basiert.
     """
-    kraftstoff = str(row["Kraftstoff"]).lower()
-    uvp = float(row["UVP"])
-    laufzeit = int(row["Laufzeit_Monate"])
-    km_gesamt = float(row["Freikilometer"])
-    leasingrate_faktor = float(row["Leasingrate_Faktor"])
-    verbrauch_l = float(row.get("Verbrauch_L_100", 0.0))
-    verbrauch_kwh = float(row.get("Verbrauch_kWh_100", 0.0))
-    sprit = row["Sprit"]
-
-    def geldwerter_vorteil_berechnen() -> tuple[float, float]:
-        """
-        Geldwerter Vorteil entsteht nur bei Verbrennern mit Leasingrate < 1 %.
-        Rückgabe:
-          - geldwerter Vorteil pro Monat
-          - Steuerlast-Anteil (1/3) pro Monat, der auf die Rate aufgeschlagen wird
-        """
-        if kraftstoff not in ("benzin", "diesel"):
-            return 0.0, 0.0
-        if leasingrate_faktor >= 0.01:
-            return 0.0, 0.0
-
-        private_nutzung = math.floor(uvp * 0.01)
-        leasingrate_abs = uvp * leasingrate_faktor
-        geldwerter_vorteil = max(private_nutzung - leasingrate_abs, 0.0)
-        steueranteil = geldwerter_vorteil / 3
-        return geldwerter_vorteil, steueranteil
-
+    kraftstoff = raw_df["Kraftstoff"].to_numpy()
+    uvp = raw_df["UVP"].to_numpy()
+    laufzeit = raw_df["Laufzeit_Monate"].to_numpy()
+    km_gesamt = raw_df["Freikilometer"].to_numpy()
+    leasingrate_faktor = raw_df["Leasingrate_Faktor"].to_numpy()
+    verbrauch_l = raw_df["Verbrauch_L_100"].to_numpy()
+    verbrauch_kwh = raw_df["Verbrauch_kWh_100"].to_numpy()
+    spritpreis = raw_df["Sprit"].map(spritpreise_series).fillna(0.0).to_numpy()
+    strompreis = spritpreise_series.get("Strom", 0.0)
+
+    ist_verbrenner = np.isin(kraftstoff, ("benzin", "diesel"))
+    ist_elektro = kraftstoff == "elektro"
+    ist_hybrid = np.isin(kraftstoff, ("elektro/hybrid", "hybrid"))
+
+    # Geldwerter Vorteil entsteht nur bei Verbrennern mit Leasingrate < 1 %,
+    # 1/3 davon wird als Steueranteil auf die Rate aufgeschlagen
     leasingkosten_pro_monat_basis = uvp * leasingrate_faktor
-    geldwerter_vorteil, steueranteil = geldwerter_vorteil_berechnen()
+    private_nutzung = np.floor(uvp * 0.01)
+    geldwerter_vorteil = np.where(
+        ist_verbrenner & (leasingrate_faktor < 0.01),
+        np.maximum(private_nutzung - leasingkosten_pro_monat_basis, 0.0),
+        0.0,
+    )
+    steueranteil = geldwerter_vorteil / 3
     leasingkosten_pro_monat = leasingkosten_pro_monat_basis + steueranteil
 
-    if laufzeit <= 0:
-        # Laufzeit 0 oder negativ → nur monatliche Leasingkosten, Rest 0
-        return pd.Series(
-            {
-                "Leasingkosten / Monat": round(leasingkosten_pro_monat, 2),
-                "Leasingkosten (Gesamt)": 0.0,
-                "Geldwerter Vorteil / Monat": round(geldwerter_vorteil, 2),
-                "Steuerlicher Aufschlag / Monat": round(steueranteil, 2),
-                "Spritkosten / Monat": 0.0,
-                "Spritkosten (Gesamt)": 0.0,
-                "Gesamtkosten / Monat": round(leasingkosten_pro_monat, 2),
-                "Kosten (Gesamt)": 0.0,
-            }
-        )
-
-    spritkosten_pro_monat = 0.0
-
-    if kraftstoff in ("benzin", "diesel"):
-        spritpreis = spritpreise.get(sprit, 0.0)
-        spritkosten_pro_monat = km_gesamt / 100.0 * verbrauch_l * spritpreis / laufzeit
-
-    elif kraftstoff == "elektro":
-        strompreis = spritpreise.get("Strom", 0.0)
-        spritkosten_pro_monat = km_gesamt / 100.0 * verbrauch_kwh * strompreis / laufzeit
-
-    elif kraftstoff in ("elektro/hybrid", "hybrid"):
-        spritpreis = spritpreise.get(sprit, 0.0)
-        strompreis = spritpreise.get("Strom", 0.0)
-        kosten_benzin = km_gesamt / 100.0 * verbrauch_l * spritpreis / laufzeit
-        kosten_strom = km_gesamt / 100.0 * verbrauch_kwh * strompreis / laufzeit
-        spritkosten_pro_monat = kosten_benzin + kosten_strom
+    # Laufzeit 0 oder negativ → nur monatliche Leasingkosten, Rest 0
+    hat_laufzeit = laufzeit > 0
+    laufzeit_divisor = np.where(hat_laufzeit, laufzeit, 1.0)
+    laufzeit_gesamt = np.where(hat_laufzeit, laufzeit, 0.0)
+
+    kosten_benzin = km_gesamt / 100.0 * verbrauch_l * spritpreis / laufzeit_divisor
+    kosten_strom = km_gesamt / 100.0 * verbrauch_kwh * strompreis / laufzeit_divisor
+    spritkosten_pro_monat = np.select(
+        [ist_verbrenner, ist_elektro, ist_hybrid],
+        [kosten_benzin, kosten_strom, kosten_benzin + kosten_strom],
+        default=0.0,
+    )
+    spritkosten_pro_monat = np.where(hat_laufzeit, spritkosten_pro_monat, 0.0)
 
-    leasingkosten_gesamt = leasingkosten_pro_monat * laufzeit
-    spritkosten_gesamt = spritkosten_pro_monat * laufzeit
     gesamtkosten_pro_monat = leasingkosten_pro_monat + spritkosten_pro_monat
-    kosten_gesamt = gesamtkosten_pro_monat * laufzeit
 
-    return pd.Series(
+    return pd.DataFrame(
         {
-            "Leasingkosten / Monat": round(leasingkosten_pro_monat, 2),
-            "Leasingkosten (Gesamt)": round(leasingkosten_gesamt, 2),
-            "Geldwerter Vorteil / Monat": round(geldwerter_vorteil, 2),
-            "Steuerlicher Aufschlag / Monat": round(steueranteil, 2),
-            "Spritkosten / Monat": round(spritkosten_pro_monat, 2),
-            "Spritkosten (Gesamt)": round(spritkosten_gesamt, 2),
-            "Gesamtkosten / Monat": round(gesamtkosten_pro_monat, 2),
-            "Kosten (Gesamt)": round(kosten_gesamt, 2),
-        }
+            "Leasingkosten / Monat": leasingkosten_pro_monat,
+            "Leasingkosten (Gesamt)": leasingkosten_pro_monat * laufzeit_gesamt,
+            "Geldwerter Vorteil / Monat": geldwerter_vorteil,
+            "Steuerlicher Aufschlag / Monat": steueranteil,
+            "Spritkosten / Monat": spritkosten_pro_monat,
+            "Spritkosten (Gesamt)": spritkosten_pro_monat * laufzeit_gesamt,
+            "Gesamtkosten / Monat": gesamtkosten_pro_monat,
+            "Kosten (Gesamt)": gesamtkosten_pro_monat * laufzeit_gesamt,
+        },
+        index=raw_df.index,
     )
 
 
@@ -389,10 +509,13 @@ def berechne_kosten(row: pd.Series) -> pd.Series:
 # Daten laden & Session-Setup
 # =====================================================================
 
-autos, leasing = load_data()
+tree, leasing_groups = load_data()
+
+# Modellliste für alle Slots (Reihenfolge wie in autos.csv)
+modelle = tuple(tree)
 
 if "ranking" not in st.session_state:
-    st.session_state["ranking"] = []  # Liste von Dicts
+    st.session_state["ranking"] = {}  # Slot → Dict
 if "ranking_updated" not in st.session_state:
     st.session_state["ranking_updated"] = False
 if "ranking_message_slot" not in st.session_state:
@@ -407,24 +530,20 @@ def hydrate_slot_state_from_ranking() -> None:
         if key not in st.session_state and value is not None:
             st.session_state[key] = value
 
-    for entry in st.session_state.get("ranking", []):
-        slot = entry.get("Slot")
-        if slot is None:
-            continue
-
+    for slot, entry in st.session_state.get("ranking", {}).items():
         set_if_missing(f"modell_{slot}", entry.get("Modell"))
         set_if_missing(f"variation_{slot}", entry.get("Ausstattungslinie"))
         set_if_missing(f"motor_{slot}", entry.get("Motor"))
         set_if_missing(f"last_motor_{slot}", entry.get("Motor"))
-        set_if_missing(f"uvp_{slot}", int(float(entry.get("UVP", 0))))
+        set_if_missing(f"uvp_{slot}", entry.get("UVP"))
         set_if_missing(f"sprit_{slot}", entry.get("Sprit"))
-        set_if_missing(f"verbrauch_l_{slot}", round(float(entry.get("Verbrauch_L_100", 0.0)), 1))
-        set_if_missing(f"verbrauch_kwh_{slot}", round(float(entry.get("Verbrauch_kWh_100", 0.0)), 1))
-        set_if_missing(f"time_{slot}", int(entry.get("Laufzeit_Monate", 0)))
-        set_if_missing(f"km_{slot}", int(entry.get("Freikilometer", 0)))
+        set_if_missing(f"verbrauch_l_{slot}", round(entry.get("Verbrauch_L_100", 0.0), 1))
+        set_if_missing(f"verbrauch_kwh_{slot}", round(entry.get("Verbrauch_kWh_100", 0.0), 1))
+        set_if_missing(f"time_{slot}", entry.get("Laufzeit_Monate"))
+        set_if_missing(f"km_{slot}", entry.get("Freikilometer"))
         set_if_missing(
             f"rate_{slot}",
-            round(float(entry.get("Leasingrate_Faktor", 0.0)) * 100, 1),
+            round(entry.get("Leasingrate_Faktor", 0.0) * 100, 1),
         )
         set_if_missing(f"description_{slot}", entry.get("Beschreibung", ""))
         set_if_missing(f"leasing_{slot}", entry.get("Leasingoption"))
@@ -615,33 +734,27 @@ except Exception as e:
         "Strom": strom,
     }
 
-cols = st.columns(len(spritpreise))
-for i, (sorte, preis) in enumerate(spritpreise.items()):
-    card_style = (
-        f"text-align: center; background: {secondary_bg}; color: {theme_text}; "
-        f"font-family: 'Inter', sans-serif; font-size: 16px; padding: 12px; "
-        f"border-radius: 12px; border: 1px solid {card_border}; "
-        f"box-shadow: 0 10px 24px rgba(0,0,0,0.12);"
-    )
-    price_color = ACCENT_NEON if dark_mode else PRIMARY_GREEN
-    if sorte != "Strom":
-        cols[i].markdown(
-            f"""
-            <div style="{card_style}">
-                {sorte}<br><span style='font-size:34px; font-weight:700; color:{price_color};'>{preis:.2f} €</span>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-    else:
-        cols[i].markdown(
-            f"""
-            <div style="{card_style}">
-                {sorte}<br><span style='font-size:34px; font-weight:700; color:{price_color};'>{preis:.2f} €</span>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+# Preistabelle als Series für das spaltenweise Mapping in berechne_kosten
+spritpreise_series = pd.Series(spritpreise, dtype="float64")
+
+# Alle Preiskacheln in einem einzigen Markdown-Block rendern
+card_style = (
+    f"flex: 1; text-align: center; background: {secondary_bg}; color: {theme_text}; "
+    f"font-family: 'Inter', sans-serif; font-size: 16px; padding: 12px; "
+    f"border-radius: 12px; border: 1px solid {card_border}; "
+    f"box-shadow: 0 10px 24px rgba(0,0,0,0.12);"
+)
+price_color = ACCENT_NEON if dark_mode else PRIMARY_GREEN
+preis_kacheln = "".join(
+    f"<div style=\"{card_style}\">"
+    f"{sorte}<br><span style='font-size:34px; font-weight:700; color:{price_color};'>{preis:.2f} €</span>"
+    "</div>"
+    for sorte, preis in spritpreise.items()
+)
+st.markdown(
+    f"<div style='display: flex; gap: 1rem;'>{preis_kacheln}</div>",
+    unsafe_allow_html=True,
+)
 
 st.caption(
     "\\* Kraftstoffpreise: E5, E10 und Diesel basieren auf Daten von "
@@ -664,22 +777,26 @@ st.markdown(
 )
 
 if st.session_state["ranking"]:
-    raw_df = pd.DataFrame(st.session_state["ranking"])
-
-    kosten_df = raw_df.apply(berechne_kosten, axis=1)
-    ranking_df = pd.concat([raw_df, kosten_df], axis=1)
-
-    ranking_df = ranking_df.sort_values("Gesamtkosten / Monat", ascending=True)
-
-    geld_spalten = [
-        "UVP",
-        "Leasingkosten / Monat",
-        "Leasingkosten (Gesamt)",
-        "Spritkosten / Monat",
-        "Spritkosten (Gesamt)",
-        "Gesamtkosten / Monat",
-        "Kosten (Gesamt)",
-    ]
+    # Ranking inkl. Kosten nur neu aufbauen, wenn sich Ranking oder Spritpreise ändern
+    preis_key = tuple(spritpreise.items())
+    if (
+        st.session_state["ranking_updated"]
+        or st.session_state.get("ranking_preis_key") != preis_key
+        or "ranking_df" not in st.session_state
+    ):
+        raw_df = pd.DataFrame(list(st.session_state["ranking"].values()))
+        kosten_df = berechne_kosten(raw_df)
+        # Kraftstoff wird klein geladen, in der Anzeige wieder groß
+        raw_df["Kraftstoff"] = raw_df["Kraftstoff"].str.capitalize()
+        reihenfolge = np.argsort(
+            kosten_df["Gesamtkosten / Monat"].to_numpy(), kind="stable"
+        )
+        st.session_state["ranking_df"] = pd.concat(
+            [raw_df, kosten_df.round(2)], axis=1
+        ).iloc[reihenfolge]
+        st.session_state["ranking_preis_key"] = preis_key
+        st.session_state["ranking_updated"] = False
+    ranking_df = st.session_state["ranking_df"]
 
     # Umschaltbare Ansichten fürs Ranking: kompakt vs. alle Details
     basis_spalten = [
@@ -711,10 +828,10 @@ if st.session_state["ranking"]:
     alle_spalten = basis_spalten + rest_spalten
 
     # Top 3 Highlight
-    top3 = ranking_df.head(3)
-    if not top3.empty:
+    top3 = ranking_df.head(3).to_dict("records")
+    if top3:
         top_cols = st.columns(len(top3))
-        for idx, (_, row) in enumerate(top3.iterrows()):
+        for idx, row in enumerate(top3):
             bild = row.get("Bild", "")
             kosten_monat = math.ceil(row.get("Gesamtkosten / Monat", 0) or 0)
             modell = row.get("Modell", "Unbekannt")
@@ -753,69 +870,23 @@ if st.session_state["ranking"]:
     # Verbrauchswerte auf eine Nachkommastelle bringen (z. B. 7.0)
     for col in ("Verbrauch_L_100", "Verbrauch_kWh_100"):
         if col in display_df.columns:
-            display_df[col] = display_df[col].apply(
-                lambda v: round(float(v), 1) if pd.notna(v) else v
-            )
+            display_df[col] = display_df[col].astype("float64").round(1)
 
     # Kosten aufrunden (Ganzzahlen) für Anzeige
-    kosten_spalten = [
-        "UVP",
-        "Leasingkosten / Monat",
-        "Leasingkosten (Gesamt)",
-        "Spritkosten / Monat",
-        "Spritkosten (Gesamt)",
-        "Gesamtkosten / Monat",
-        "Kosten (Gesamt)",
-    ]
-    for col in kosten_spalten:
+    for col in GELD_SPALTEN:
         if col in display_df.columns:
-            display_df[col] = display_df[col].apply(
-                lambda v: math.ceil(float(v)) if pd.notna(v) else v
-            )
+            display_df[col] = np.ceil(
+                display_df[col].astype("float64")
+            ).astype("Int64")
 
     # Leasingoption nicht anzeigen
     display_df = display_df.drop(columns=["Leasingoption"], errors="ignore")
 
-    currency_cols_int = [
-        "UVP",
-        "Leasingkosten / Monat",
-        "Leasingkosten (Gesamt)",
-        "Spritkosten / Monat",
-        "Spritkosten (Gesamt)",
-        "Gesamtkosten / Monat",
-        "Kosten (Gesamt)",
-    ]
-
-    column_config = {"Bild": st.column_config.ImageColumn()}
-    column_config.update(
-        {
-            col: st.column_config.NumberColumn(format="€%.0f")
-            for col in currency_cols_int
-            if col in display_df.columns
-        }
-    )
-    currency_cols_precise = [
-        "Geldwerter Vorteil / Monat",
-        "Steuerlicher Aufschlag / Monat",
-    ]
-    for col in currency_cols_precise:
-        if col in display_df.columns:
-            column_config[col] = st.column_config.NumberColumn(format="€%.2f")
-    if "Freikilometer" in display_df.columns:
-        column_config["Freikilometer"] = st.column_config.NumberColumn(format="%.0f")
-
-    for col in ("Verbrauch_L_100", "Verbrauch_kWh_100"):
-        if col in display_df.columns:
-            column_config[col] = st.column_config.NumberColumn(format="%.1f")
-
-    if "Leasingrate_Faktor" in display_df.columns:
-        column_config["Leasingrate_Faktor"] = st.column_config.NumberColumn(format="%.1f")
-
     st.markdown("<div style='height:16px;'></div>", unsafe_allow_html=True)
     with st.expander("Ausführliches Ranking"):
         st.dataframe(
             display_df,
-            column_config=column_config,
+            column_config=ranking_column_config(),
             use_container_width=True,
             hide_index=True,
         )
@@ -851,481 +922,469 @@ st.markdown(
     f"<h2 style='text-align: center; color:{theme_text}; letter-spacing:0.02em;'>🚘 Autoauswahl</h2>",
     unsafe_allow_html=True,
 )
-cars_per_row = 4
-rows = 2
 
-for row_idx in range(rows):
-    auto_cols = st.columns(cars_per_row, border=False)
 
-    for i in range(cars_per_row):
-        car_index = row_idx * cars_per_row + i
-        slot_id = car_index + 1
+@st.fragment
+def render_car_slot(
+    slot_id: int,
+    tree: dict,
+    leasing_groups: dict,
+) -> None:
+    """
+    Rendert die Auswahlkarte eines Slots inkl. Ranking-Buttons.
 
-        with auto_cols[i]:
-            with stylable_container(
-                key=f"car_card_{slot_id}",
-                css_styles=f"""
-                    {{
-                        border: 2px solid {card_border};
-                        border-radius: 12px;
-                        padding: 16px;
-                        background: {secondary_bg if dark_mode else "#ffffff"};
-                        box-shadow: 0 8px 20px rgba(0,0,0,0.12);
-                        width: 100%;
-                        display: block;
-                    }}
-                """,
-            ):
-                st.markdown(
-                    f"<h2 style='text-align: center; font-size:20px; color:{theme_text}; margin-top:0;'>Auto {slot_id}</h2>",
-                    unsafe_allow_html=True,
-                )
+    Läuft als Fragment: Eingaben in einem Slot führen nur diesen Slot neu aus.
+    Änderungen am Ranking starten die ganze App per st.rerun() neu.
+    """
+    with stylable_container(
+        key=f"car_card_{slot_id}",
+        css_styles=f"""
+            {{
+                border: 2px solid {card_border};
+                border-radius: 12px;
+                padding: 16px;
+                background: {secondary_bg if dark_mode else "#ffffff"};
+                box-shadow: 0 8px 20px rgba(0,0,0,0.12);
+                width: 100%;
+                display: block;
+            }}
+        """,
+    ):
+        st.markdown(
+            f"<h2 style='text-align: center; font-size:20px; color:{theme_text}; margin-top:0;'>Auto {slot_id}</h2>",
+            unsafe_allow_html=True,
+        )
 
-                # Modell-Selectbox (Auswahlpflicht)
-                modelle = autos["Modell"].unique()
-                selected_model = st.selectbox(
-                    "Modell",
-                    modelle,
-                    index=None,
-                    placeholder="Bitte wählen",
-                    key=f"modell_{slot_id}",
-                )
+        # Modell-Selectbox (Auswahlpflicht)
+        selected_model = st.selectbox(
+            "Modell",
+            modelle,
+            index=None,
+            placeholder="Bitte wählen",
+            key=f"modell_{slot_id}",
+        )
 
-                # Ausstattungslinie, auto-select bei genau einer Option
-                if selected_model:
-                    variationen = autos[autos["Modell"] == selected_model][
-                        "Ausstattungslinie"
-                    ].unique()
-                else:
-                    variationen = []
+        # Ausstattungslinie, auto-select bei genau einer Option
+        if selected_model:
+            variationen = tuple(tree.get(selected_model, {}))
+        else:
+            variationen = []
+
+        selected_variation = auto_selectbox_single(
+            "Ausstattungslinie",
+            variationen,
+            key=f"variation_{slot_id}",
+            placeholder="Bitte wählen",
+            disabled=not bool(selected_model),
+        )
 
-                selected_variation = auto_selectbox_single(
-                    "Ausstattungslinie",
-                    variationen,
-                    key=f"variation_{slot_id}",
-                    placeholder="Bitte wählen",
-                    disabled=not bool(selected_model),
-                )
+        # Motor, auto-select bei genau einer Option
+        if selected_model and selected_variation:
+            motoren = tuple(
+                tree.get(selected_model, {}).get(selected_variation, {})
+            )
+        else:
+            motoren = []
+
+        selected_engine = auto_selectbox_single(
+            "Motor",
+            motoren,
+            key=f"motor_{slot_id}",
+            placeholder="Bitte wählen",
+            disabled=not bool(selected_variation),
+        )
 
-                # Motor, auto-select bei genau einer Option
-                if selected_model and selected_variation:
-                    motoren = autos[
-                        (autos["Modell"] == selected_model)
-                        & (autos["Ausstattungslinie"] == selected_variation)
-                    ]["Motor"].unique()
-                else:
-                    motoren = []
+        # Motorinfos vorbereiten
+        has_motor = False
+        bild = ""
+        kraftstoff = None
+        kategorie = None
+        verbrauch_l_default = 0.0
+        verbrauch_kwh_default = 0.0
+        uvp_default = 0
+
+        if selected_engine:
+            row_info = (
+                tree.get(selected_model, {})
+                .get(selected_variation, {})
+                .get(selected_engine)
+            )
+            if row_info is not None:
+                has_motor = True
+                bild = row_info.get("Bild", "")
+                kraftstoff = row_info["Kraftstoff"]
+                kategorie = row_info["Kategorie"]  # z. B. Verbrenner / Elektro/Hybrid
+                uvp_default = int(row_info["Preis"])
+                verbrauch_l_default = row_info["l/100km"]
+                verbrauch_kwh_default = row_info["kWh/100km"]
+
+                last_motor_key = f"last_motor_{slot_id}"
+                if st.session_state.get(last_motor_key) != selected_engine:
+                    st.session_state[last_motor_key] = selected_engine
+                    st.session_state[f"uvp_{slot_id}"] = uvp_default
+                    st.session_state[f"verbrauch_l_{slot_id}"] = round(
+                        verbrauch_l_default, 1
+                    )
+                    st.session_state[f"verbrauch_kwh_{slot_id}"] = round(
+                        verbrauch_kwh_default, 1
+                    )
+
+        # UVP-Eingabe (bei fehlenden Daten deaktiviert)
+        uvp_value = st.session_state.get(f"uvp_{slot_id}", uvp_default)
+        uvp = st.number_input(
+            "UVP (in €)",
+            value=uvp_value,
+            min_value=0,
+            step=1000,
+            key=f"uvp_{slot_id}",
+            disabled=not has_motor,
+        )
 
-                selected_engine = auto_selectbox_single(
-                    "Motor",
-                    motoren,
-                    key=f"motor_{slot_id}",
+        # Kraftstoff + Verbrauchseingaben
+        selected_sprit = None
+        verbrauch_input = 0.0       # L/100km
+        verbrauch_input_strom = 0.0 # kWh/100km
+
+        if has_motor:
+            if kraftstoff == "benzin":
+                selected_sprit = auto_selectbox_single(
+                    "Kraftstoff",
+                    SPRIT_ARTEN,
+                    key=f"sprit_{slot_id}",
                     placeholder="Bitte wählen",
-                    disabled=not bool(selected_variation),
                 )
+                st.markdown("**Verbrenner:**")
+                verbrauch_value = st.session_state.get(
+                    f"verbrauch_l_{slot_id}", round(verbrauch_l_default, 1)
+                )
+                verbrauch_input = st.number_input(
+                    "Verbrauch (L/100km)",
+                    value=verbrauch_value,
+                    min_value=0.0,
+                    step=0.1,
+                    format="%.1f",
+                    key=f"verbrauch_l_{slot_id}",
+                )
+                verbrauch_input_strom = 0.0
 
-                # Motorinfos vorbereiten
-                motor_info = pd.DataFrame()
-                has_motor = False
-                bild = ""
-                kraftstoff = None
-                verbrauch_l_default = 0.0
-                verbrauch_kwh_default = 0.0
-                uvp_default = 0
-
-                if selected_engine:
-                    motor_info = autos[
-                        (autos["Modell"] == selected_model)
-                        & (autos["Ausstattungslinie"] == selected_variation)
-                        & (autos["Motor"] == selected_engine)
-                    ]
-                    if not motor_info.empty:
-                        has_motor = True
-                        row_info = motor_info.iloc[0]
-                        bild = row_info.get("Bild", "")
-                        kraftstoff = row_info["Kraftstoff"]
-                        uvp_default = int(float(row_info.get("Preis", 0)))
-                        verbrauch_l_default = float(row_info["l/100km"])
-                        verbrauch_kwh_default = float(row_info["kWh/100km"])
-
-                        last_motor_key = f"last_motor_{slot_id}"
-                        if st.session_state.get(last_motor_key) != selected_engine:
-                            st.session_state[last_motor_key] = selected_engine
-                            st.session_state[f"uvp_{slot_id}"] = uvp_default
-                            st.session_state[f"verbrauch_l_{slot_id}"] = round(
-                                verbrauch_l_default, 1
-                            )
-                            st.session_state[f"verbrauch_kwh_{slot_id}"] = round(
-                                verbrauch_kwh_default, 1
-                            )
-
-                # UVP-Eingabe (bei fehlenden Daten deaktiviert)
-                uvp_value = st.session_state.get(f"uvp_{slot_id}", uvp_default)
-                uvp = st.number_input(
-                    "UVP (in €)",
-                    value=uvp_value,
-                    min_value=0,
-                    step=1000,
-                    key=f"uvp_{slot_id}",
-                    disabled=not has_motor,
+            elif kraftstoff == "diesel":
+                selected_sprit = auto_selectbox_single(
+                    "Kraftstoff",
+                    ["Diesel"],
+                    key=f"sprit_{slot_id}",
+                    placeholder="Bitte wählen",
+                )
+                st.markdown("**Verbrenner:**")
+                verbrauch_value = st.session_state.get(
+                    f"verbrauch_l_{slot_id}", round(verbrauch_l_default, 1)
+                )
+                verbrauch_input = st.number_input(
+                    "Verbrauch (L/100km)",
+                    value=verbrauch_value,
+                    min_value=0.0,
+                    step=0.1,
+                    format="%.1f",
+                    key=f"verbrauch_l_{slot_id}",
                 )
+                verbrauch_input_strom = 0.0
 
-                # Kraftstoff + Verbrauchseingaben
-                sprit_arten = ["Super E10", "Super E5", "Super+"]
-                selected_sprit = None
-                verbrauch_input = 0.0       # L/100km
-                verbrauch_input_strom = 0.0 # kWh/100km
-
-                if has_motor:
-                    kf = kraftstoff.lower()
-
-                    if kf == "benzin":
-                        selected_sprit = auto_selectbox_single(
-                            "Kraftstoff",
-                            sprit_arten,
-                            key=f"sprit_{slot_id}",
-                            placeholder="Bitte wählen",
-                        )
-                        st.markdown("**Verbrenner:**")
-                        verbrauch_value = st.session_state.get(
-                            f"verbrauch_l_{slot_id}", round(verbrauch_l_default, 1)
-                        )
-                        verbrauch_input = st.number_input(
-                            "Verbrauch (L/100km)",
-                            value=verbrauch_value,
-                            min_value=0.0,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"verbrauch_l_{slot_id}",
-                        )
-                        verbrauch_input_strom = 0.0
-
-                    elif kf == "diesel":
-                        selected_sprit = auto_selectbox_single(
-                            "Kraftstoff",
-                            ["Diesel"],
-                            key=f"sprit_{slot_id}",
-                            placeholder="Bitte wählen",
-                        )
-                        st.markdown("**Verbrenner:**")
-                        verbrauch_value = st.session_state.get(
-                            f"verbrauch_l_{slot_id}", round(verbrauch_l_default, 1)
-                        )
-                        verbrauch_input = st.number_input(
-                            "Verbrauch (L/100km)",
-                            value=verbrauch_value,
-                            min_value=0.0,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"verbrauch_l_{slot_id}",
-                        )
-                        verbrauch_input_strom = 0.0
-
-                    elif kf == "elektro":
-                        selected_sprit = auto_selectbox_single(
-                            "Kraftstoff",
-                            ["Strom"],
-                            key=f"sprit_{slot_id}",
-                            placeholder="Bitte wählen",
-                        )
-                        verbrauch_input = 0.0
-                        st.markdown("**E-Motor:**")
-                        verbrauch_value_strom = st.session_state.get(
-                            f"verbrauch_kwh_{slot_id}", round(verbrauch_kwh_default, 1)
-                        )
-                        verbrauch_input_strom = st.number_input(
-                            "Verbrauch (kWh/100km)",
-                            value=verbrauch_value_strom,
-                            min_value=0.0,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"verbrauch_kwh_{slot_id}",
-                        )
+            elif kraftstoff == "elektro":
+                selected_sprit = auto_selectbox_single(
+                    "Kraftstoff",
+                    ["Strom"],
+                    key=f"sprit_{slot_id}",
+                    placeholder="Bitte wählen",
+                )
+                verbrauch_input = 0.0
+                st.markdown("**E-Motor:**")
+                verbrauch_value_strom = st.session_state.get(
+                    f"verbrauch_kwh_{slot_id}", round(verbrauch_kwh_default, 1)
+                )
+                verbrauch_input_strom = st.number_input(
+                    "Verbrauch (kWh/100km)",
+                    value=verbrauch_value_strom,
+                    min_value=0.0,
+                    step=0.1,
+                    format="%.1f",
+                    key=f"verbrauch_kwh_{slot_id}",
+                )
 
-                    elif kf in ("elektro/hybrid", "hybrid"):
-                        selected_sprit = auto_selectbox_single(
-                            "Kraftstoff",
-                            sprit_arten,
-                            key=f"sprit_{slot_id}",
-                            placeholder="Bitte wählen",
-                        )
-                        c1, c2 = st.columns(2)
-                        with c1:
-                            st.markdown("**Verbrenner:**")
-                            verbrauch_value = st.session_state.get(
-                                f"verbrauch_l_{slot_id}", round(verbrauch_l_default, 1)
-                            )
-                            verbrauch_input = st.number_input(
-                                "Verbrauch (L/100km)",
-                                value=verbrauch_value,
-                                min_value=0.0,
-                                step=0.1,
-                                format="%.1f",
-                                key=f"verbrauch_l_{slot_id}",
-                            )
-                        with c2:
-                            st.markdown("**E-Motor:**")
-                            verbrauch_value_strom = st.session_state.get(
-                                f"verbrauch_kwh_{slot_id}", round(verbrauch_kwh_default, 1)
-                            )
-                            verbrauch_input_strom = st.number_input(
-                                "Verbrauch (kWh/100km)",
-                                value=verbrauch_value_strom,
-                                min_value=0.0,
-                                step=0.1,
-                                format="%.1f",
-                                key=f"verbrauch_kwh_{slot_id}",
-                            )
-                    else:
-                        # Unbekannter Kraftstoff → Eingaben werden deaktiviert
-                        st.selectbox(
-                            "Kraftstoff",
-                            [],
-                            index=None,
-                            placeholder="Keine Daten",
-                            key=f"sprit_{slot_id}",
-                            disabled=True,
-                        )
-                        verbrauch_input = st.number_input(
-                            "Verbrauch (L/100km)",
-                            value=0.0,
-                            min_value=0.0,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"verbrauch_l_{slot_id}",
-                            disabled=True,
-                        )
-                        verbrauch_input_strom = st.number_input(
-                            "Verbrauch (kWh/100km)",
-                            value=0.0,
-                            min_value=0.0,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"verbrauch_kwh_{slot_id}",
-                            disabled=True,
-                        )
-                else:
-                    # Ohne Motor-Auswahl werden Verbrauchs-Eingaben deaktiviert dargestellt
-                    st.selectbox(
-                        "Kraftstoff",
-                        [],
-                        index=None,
-                        placeholder="Bitte zuerst Motor wählen",
-                        key=f"sprit_{slot_id}",
-                        disabled=True,
+            elif kraftstoff in ("elektro/hybrid", "hybrid"):
+                selected_sprit = auto_selectbox_single(
+                    "Kraftstoff",
+                    SPRIT_ARTEN,
+                    key=f"sprit_{slot_id}",
+                    placeholder="Bitte wählen",
+                )
+                c1, c2 = st.columns(2)
+                with c1:
+                    st.markdown("**Verbrenner:**")
+                    verbrauch_value = st.session_state.get(
+                        f"verbrauch_l_{slot_id}", round(verbrauch_l_default, 1)
                     )
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        st.markdown("**Verbrenner:**")
-                        verbrauch_input = st.number_input(
-                            "Verbrauch (L/100km)",
-                            value=0.0,
-                            min_value=0.0,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"verbrauch_l_{slot_id}",
-                            disabled=True,
-                        )
-                    with c2:
-                        st.markdown("**E-Motor:**")
-                        verbrauch_input_strom = st.number_input(
-                            "Verbrauch (kWh/100km)",
-                            value=0.0,
-                            min_value=0.0,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"verbrauch_kwh_{slot_id}",
-                            disabled=True,
-                        )
+                    verbrauch_input = st.number_input(
+                        "Verbrauch (L/100km)",
+                        value=verbrauch_value,
+                        min_value=0.0,
+                        step=0.1,
+                        format="%.1f",
+                        key=f"verbrauch_l_{slot_id}",
+                    )
+                with c2:
+                    st.markdown("**E-Motor:**")
+                    verbrauch_value_strom = st.session_state.get(
+                        f"verbrauch_kwh_{slot_id}", round(verbrauch_kwh_default, 1)
+                    )
+                    verbrauch_input_strom = st.number_input(
+                        "Verbrauch (kWh/100km)",
+                        value=verbrauch_value_strom,
+                        min_value=0.0,
+                        step=0.1,
+                        format="%.1f",
+                        key=f"verbrauch_kwh_{slot_id}",
+                    )
+            else:
+                # Unbekannter Kraftstoff → Eingaben werden deaktiviert
+                st.selectbox(
+                    "Kraftstoff",
+                    [],
+                    index=None,
+                    placeholder="Keine Daten",
+                    key=f"sprit_{slot_id}",
+                    disabled=True,
+                )
+                verbrauch_input = st.number_input(
+                    "Verbrauch (L/100km)",
+                    value=0.0,
+                    min_value=0.0,
+                    step=0.1,
+                    format="%.1f",
+                    key=f"verbrauch_l_{slot_id}",
+                    disabled=True,
+                )
+                verbrauch_input_strom = st.number_input(
+                    "Verbrauch (kWh/100km)",
+                    value=0.0,
+                    min_value=0.0,
+                    step=0.1,
+                    format="%.1f",
+                    key=f"verbrauch_kwh_{slot_id}",
+                    disabled=True,
+                )
+        else:
+            # Ohne Motor-Auswahl werden Verbrauchs-Eingaben deaktiviert dargestellt
+            st.selectbox(
+                "Kraftstoff",
+                [],
+                index=None,
+                placeholder="Bitte zuerst Motor wählen",
+                key=f"sprit_{slot_id}",
+                disabled=True,
+            )
+            c1, c2 = st.columns(2)
+            with c1:
+                st.markdown("**Verbrenner:**")
+                verbrauch_input = st.number_input(
+                    "Verbrauch (L/100km)",
+                    value=0.0,
+                    min_value=0.0,
+                    step=0.1,
+                    format="%.1f",
+                    key=f"verbrauch_l_{slot_id}",
+                    disabled=True,
+                )
+            with c2:
+                st.markdown("**E-Motor:**")
+                verbrauch_input_strom = st.number_input(
+                    "Verbrauch (kWh/100km)",
+                    value=0.0,
+                    min_value=0.0,
+                    step=0.1,
+                    format="%.1f",
+                    key=f"verbrauch_kwh_{slot_id}",
+                    disabled=True,
+                )
 
-                # Leasingoptionen nach Kategorie des Motors filtern
-                passende_leasing = pd.DataFrame()
-                if has_motor:
-                    kategorie = motor_info["Kategorie"].values[0]  # z. B. Verbrenner / Elektro/Hybrid
-                    motor_str = motor_info["Motor"].values[0]
+        # Leasingoptionen nach Kategorie des Motors filtern
+        passende_leasing: dict[str, dict] = {}
+        if has_motor:
+            bedingung_kraftstoff, bedingung_modell = find_leasing_bedingung(
+                leasing_groups, kategorie, selected_model
+            )
 
-                    bedingung_kraftstoff, bedingung_modell = find_leasing_bedingung(
-                        leasing, kategorie, selected_model
-                    )
+            passende_leasing = leasing_groups.get(
+                (bedingung_kraftstoff, bedingung_modell), {}
+            )
 
-                    passende_leasing = leasing[
-                        (leasing["Bedingung Kraftstoff"] == bedingung_kraftstoff)
-                        & (leasing["Bedingung Modell"] == bedingung_modell)
-                    ]
+        leasing_options = tuple(passende_leasing)
 
-                leasing_options = (
-                    passende_leasing["Leasingoption"].unique()
-                    if not passende_leasing.empty
-                    else []
-                )
+        selected_leasing = auto_selectbox_single(
+            "Leasingoption",
+            leasing_options,
+            key=f"leasing_{slot_id}",
+            placeholder="Bitte wählen",
+            disabled=not bool(has_motor),
+        )
 
-                selected_leasing = auto_selectbox_single(
-                    "Leasingoption",
-                    leasing_options,
-                    key=f"leasing_{slot_id}",
-                    placeholder="Bitte wählen",
-                    disabled=not bool(has_motor),
+        # Freikilometer / Laufzeit / Rate für Kostenberechnung
+        standard_km = 15000
+        laufzeit = 6
+        standard_rate = 0.9
+
+        c1, c2, c3 = st.columns(3)
+
+        if selected_leasing:
+            leasing_row_pre = passende_leasing.get(selected_leasing)
+            if leasing_row_pre is not None:
+                standard_km = leasing_row_pre["Freikilometer"]
+                laufzeit = leasing_row_pre["Laufzeit"]
+                standard_rate = leasing_row_pre["Leasingrate"]
+
+            with c1:
+                adjusted_rate = st.number_input(
+                    "Rate",
+                    value=float(standard_rate),
+                    min_value=0.1,
+                    max_value=1.0,
+                    step=0.1,
+                    format="%.1f",
+                    key=f"rate_{slot_id}",
+                )
+            with c2:
+                adjusted_time = st.number_input(
+                    "Laufzeit",
+                    value=int(laufzeit),
+                    min_value=6,
+                    max_value=12,
+                    step=6,
+                    key=f"time_{slot_id}",
+                )
+            with c3:
+                adjusted_km = st.number_input(
+                    "Kilometer",
+                    value=int(standard_km),
+                    min_value=0,
+                    step=1000,
+                    key=f"km_{slot_id}",
+                )
+        else:
+            with c1:
+                adjusted_rate = st.number_input(
+                    "Rate",
+                    value=0.0,
+                    format="%.1f",
+                    key=f"rate_{slot_id}",
+                    disabled=True,
+                )
+            with c2:
+                adjusted_time = st.number_input(
+                    "Laufzeit",
+                    value=0,
+                    key=f"time_{slot_id}",
+                    disabled=True,
+                )
+            with c3:
+                adjusted_km = st.number_input(
+                    "Kilometer",
+                    value=0,
+                    key=f"km_{slot_id}",
+                    disabled=True,
                 )
 
-                # Freikilometer / Laufzeit / Rate für Kostenberechnung
-                standard_km = 15000
-                laufzeit = 6
-                standard_rate = 0.9
-
-                c1, c2, c3 = st.columns(3)
-
-                if selected_leasing:
-                    leasing_row_pre = passende_leasing[
-                        passende_leasing["Leasingoption"] == selected_leasing
-                    ]
-                    if not leasing_row_pre.empty:
-                        leasing_row_pre = leasing_row_pre.iloc[0]
-                        standard_km = leasing_row_pre["Freikilometer"]
-                        laufzeit = int(leasing_row_pre["Laufzeit"])
-                        standard_rate = float(leasing_row_pre["Leasingrate"])
-
-                    with c1:
-                        adjusted_rate = st.number_input(
-                            "Rate",
-                            value=float(standard_rate),
-                            min_value=0.1,
-                            max_value=1.0,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"rate_{slot_id}",
-                        )
-                    with c2:
-                        adjusted_time = st.number_input(
-                            "Laufzeit",
-                            value=int(laufzeit),
-                            min_value=6,
-                            max_value=12,
-                            step=6,
-                            key=f"time_{slot_id}",
-                        )
-                    with c3:
-                        adjusted_km = st.number_input(
-                            "Kilometer",
-                            value=int(standard_km),
-                            min_value=0,
-                            step=1000,
-                            key=f"km_{slot_id}",
-                        )
+        # Beschreibungstext
+        st.markdown("**Optional:**")
+        description = st.text_area(
+            "Kurze Beschreibung des Fahrzeugs",
+            placeholder="z.B. besondere Ausstattung, Farbe, Optionen ...",
+            max_chars=100,
+            key=f"description_{slot_id}",
+        )
+
+        btn_col1, btn_col2 = st.columns(2)
+        with btn_col1:
+            if st.button(
+                "Ranking aktualisieren",
+                key=f"rank_{slot_id}",
+                type="primary",
+                use_container_width=True,
+            ):
+                if not (
+                    selected_model
+                    and selected_variation
+                    and selected_engine
+                    and selected_leasing
+                    and has_motor
+                ):
+                    st.warning(
+                        "Für dieses Fahrzeug werden Modell, Ausstattungslinie, Motor und Leasingoption benötigt."
+                    )
                 else:
-                    with c1:
-                        adjusted_rate = st.number_input(
-                            "Rate",
-                            value=0.0,
-                            format="%.1f",
-                            key=f"rate_{slot_id}",
-                            disabled=True,
-                        )
-                    with c2:
-                        adjusted_time = st.number_input(
-                            "Laufzeit",
-                            value=0,
-                            key=f"time_{slot_id}",
-                            disabled=True,
+                    if selected_leasing not in passende_leasing:
+                        st.error(
+                            "Leasingdaten nicht gefunden. Prüfen, ob leasing.csv und 'Leasingoption' zusammenpassen."
                         )
-                    with c3:
-                        adjusted_km = st.number_input(
-                            "Kilometer",
-                            value=0,
-                            key=f"km_{slot_id}",
-                            disabled=True,
-                        )
-
-                # Beschreibungstext
-                st.markdown("**Optional:**")
-                description = st.text_area(
-                    "Kurze Beschreibung des Fahrzeugs",
-                    placeholder="z.B. besondere Ausstattung, Farbe, Optionen ...",
-                    max_chars=100,
-                    key=f"description_{slot_id}",
-                )
-
-                btn_col1, btn_col2 = st.columns(2)
-                with btn_col1:
-                    if st.button(
-                        "Ranking aktualisieren",
-                        key=f"rank_{slot_id}",
-                        type="primary",
-                        use_container_width=True,
-                    ):
-                        if not (
-                            selected_model
-                            and selected_variation
-                            and selected_engine
-                            and selected_leasing
-                            and has_motor
-                        ):
-                            st.warning(
-                                "Für dieses Fahrzeug werden Modell, Ausstattungslinie, Motor und Leasingoption benötigt."
-                            )
+                    else:
+                        leasingrate_faktor = adjusted_rate / 100  # z. B. 0,9 → 0,009
+                        laufzeit_monate = adjusted_time
+                        freikilometer = adjusted_km
+
+                        # Ranking-Eintrag aus den aktuellen Eingaben
+                        entry = {
+                            "Bild": bild,
+                            "Slot": slot_id,
+                            "Modell": selected_model,
+                            "Ausstattungslinie": selected_variation,
+                            "Motor": selected_engine,
+                            "UVP": uvp,
+                            "Leasingoption": selected_leasing,
+                            "Freikilometer": freikilometer,
+                            "Kraftstoff": kraftstoff,
+                            "Sprit": selected_sprit,
+                            "Beschreibung": description,
+                            "Verbrauch_L_100": verbrauch_input,
+                            "Verbrauch_kWh_100": verbrauch_input_strom,
+                            "Laufzeit_Monate": laufzeit_monate,
+                            "Leasingrate_Faktor": leasingrate_faktor,
+                        }
+
+                        # Unveränderte Eingaben: kein Neuaufbau des Rankings, kein Rerun
+                        if st.session_state["ranking"].get(slot_id) == entry:
+                            st.session_state["ranking_message_slot"] = slot_id
+                            st.session_state["ranking_message_text"] = "Ranking ist bereits aktuell."
                         else:
-                            leasing_row = passende_leasing[
-                                passende_leasing["Leasingoption"] == selected_leasing
-                            ]
-                            if leasing_row.empty:
-                                st.error(
-                                    "Leasingdaten nicht gefunden. Prüfen, ob leasing.csv und 'Leasingoption' zusammenpassen."
-                                )
-                            else:
-                                leasingrate_faktor = adjusted_rate / 100  # z. B. 0,9 → 0,009
-                                laufzeit_monate = adjusted_time
-                                freikilometer = adjusted_km
-
-                                # bestehenden Eintrag für diesen Slot entfernen
-                                st.session_state["ranking"] = [
-                                    r
-                                    for r in st.session_state["ranking"]
-                                    if r.get("Slot") != slot_id
-                                ]
-
-                                # neuen Eintrag hinzufügen
-                                st.session_state["ranking"].append(
-                                    {
-                                        "Bild": bild,
-                                        "Slot": slot_id,
-                                        "Modell": selected_model,
-                                        "Ausstattungslinie": selected_variation,
-                                        "Motor": selected_engine,
-                                        "UVP": uvp,
-                                        "Leasingoption": selected_leasing,
-                                        "Freikilometer": freikilometer,
-                                        "Kraftstoff": kraftstoff,
-                                        "Sprit": selected_sprit,
-                                        "Beschreibung": description,
-                                        "Verbrauch_L_100": verbrauch_input,
-                                        "Verbrauch_kWh_100": verbrauch_input_strom,
-                                        "Laufzeit_Monate": laufzeit_monate,
-                                        "Leasingrate_Faktor": leasingrate_faktor,
-                                    }
-                                )
-
-                                st.session_state["ranking_updated"] = True
-                                st.session_state["ranking_message_slot"] = slot_id
-                                st.session_state["ranking_message_text"] = "Ranking wurde aktualisiert."
-                                st.rerun()
-                with btn_col2:
-                    if st.button(
-                        "Aus Ranking entfernen",
-                        key=f"remove_{slot_id}",
-                        type="secondary",
-                        use_container_width=True,
-                    ):
-                        before = len(st.session_state["ranking"])
-                        st.session_state["ranking"] = [
-                            r for r in st.session_state["ranking"] if r.get("Slot") != slot_id
-                        ]
-                        if len(st.session_state["ranking"]) != before:
+                            st.session_state["ranking"][slot_id] = entry
                             st.session_state["ranking_updated"] = True
                             st.session_state["ranking_message_slot"] = slot_id
-                            st.session_state["ranking_message_text"] = "Fahrzeug wurde entfernt."
-                            clear_slot_state(slot_id)
+                            st.session_state["ranking_message_text"] = "Ranking wurde aktualisiert."
                             st.rerun()
+        with btn_col2:
+            if st.button(
+                "Aus Ranking entfernen",
+                key=f"remove_{slot_id}",
+                type="secondary",
+                use_container_width=True,
+            ):
+                if st.session_state["ranking"].pop(slot_id, None) is not None:
+                    st.session_state["ranking_updated"] = True
+                    st.session_state["ranking_message_slot"] = slot_id
+                    st.session_state["ranking_message_text"] = "Fahrzeug wurde entfernt."
+                    clear_slot_state(slot_id)
+                    st.rerun()
+
+            if st.session_state.get("ranking_message_slot") == slot_id:
+                st.info(st.session_state.get("ranking_message_text", ""))
+                st.session_state["ranking_message_slot"] = None
+                st.session_state["ranking_message_text"] = ""
 
-                    if st.session_state.get("ranking_message_slot") == slot_id:
-                        st.info(st.session_state.get("ranking_message_text", ""))
-                        st.session_state["ranking_message_slot"] = None
-                        st.session_state["ranking_message_text"] = ""
+
+cars_per_row = 4
+rows = 2
+
+for row_idx in range(rows):
+    auto_cols = st.columns(cars_per_row, border=False)
+
+    for i in range(cars_per_row):
+        car_index = row_idx * cars_per_row + i
+
+        with auto_cols[i]:
+            render_car_slot(car_index + 1, tree, leasing_groups)